@@ -1,8 +1,7 @@
 import argparse
-import pandas as pd
 from tqdm import tqdm
 
-from utils import split
+from utils import read_column, split
 
 def main():
     parser = argparse.ArgumentParser(description='Build a corpus file')
@@ -10,7 +9,7 @@ def main():
     parser.add_argument('--out_path', '-o', type=str, default='data/chembl24_corpus.txt', help='output file')
     args = parser.parse_args()
 
-    smiles = pd.read_csv(args.in_path)['first'].values
+    smiles = read_column(args.in_path, 'first')
     with open(args.out_path, 'a') as f:
         for sm in tqdm(smiles):
             f.write(split(sm)+'\n')
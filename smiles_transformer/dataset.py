@@ -1,30 +1,60 @@
-import random
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
 import pandas as pd
 import torch
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset, DataLoader, get_worker_info
 
 from enumerator import SmilesEnumerator
-from utils import split
+from utils import tokenize
 
 PAD = 0
 MAX_LEN = 220
 
+# One SmilesEnumerator per process, shared by every Randomizer
+_SME = None
+
+def _get_sme():
+    global _SME
+    if _SME is None:
+        _SME = SmilesEnumerator()
+    return _SME
+
+def _randomize_k(sm, k):
+    sme = _get_sme()
+    return [sme.randomize_smiles(sm) for _ in range(k)]
+
+def _pack(strings):
+    # Strings as one UTF-8 byte buffer plus N+1 offsets, instead of a fixed-width unicode array
+    data = [sm.encode('utf-8') for sm in strings]
+    offsets = np.cumsum([0] + [len(b) for b in data], dtype=np.int64)
+    return np.frombuffer(b''.join(data), dtype=np.uint8), offsets
+
+def _unpack(buf, offsets):
+    raw = buf.tobytes()
+    offsets = offsets.tolist()
+    return [raw[offsets[i]:offsets[i+1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
 class Randomizer(object):
 
     def __init__(self):
-        self.sme = SmilesEnumerator()
+        self._rand_cache = {}
     
     def __call__(self, sm):
-        sm_r = self.sme.randomize_smiles(sm) # Random transoform
+        cands = self._rand_cache.get(sm)
+        if cands is not None:
+            return tokenize(cands[_get_sme().rng.integers(len(cands))]) # List
+        sm_r = _get_sme().randomize_smiles(sm) # Random transoform
         if sm_r is None:
-            sm_spaced = split(sm) # Spacing
+            sm_split = tokenize(sm)
         else:
-            sm_spaced = split(sm_r) # Spacing
-        sm_split = sm_spaced.split()
+            sm_split = tokenize(sm_r)
         if len(sm_split)<=MAX_LEN - 2:
             return sm_split # List
         else:
-            return split(sm).split()
+            return tokenize(sm)
 
     def random_transform(self, sm):
         '''
@@ -32,25 +62,131 @@ class Randomizer(object):
         input: A SMILES
         output: A randomized SMILES
         '''
-        return self.sme.randomize_smiles(sm)
+        return _get_sme().randomize_smiles(sm)
+
+    def fit(self, smiles, k=10):
+        '''
+        function: Precompute k randomized forms of every SMILES so that __call__ only picks one of them.
+            Trades some augmentation diversity for skipping RDKit during training.
+        input: SMILES to cache, number of forms per SMILES
+        output: self
+        '''
+        if k < 1:
+            raise ValueError('k must be at least 1, got {}'.format(k))
+        unique = list(set(smiles))
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            rand_lists = list(ex.map(partial(_randomize_k, k=k), unique, chunksize=512))
+        for sm, sms_r in zip(unique, rand_lists):
+            # Invalid or over-long forms fall back to the original SMILES, as in __call__
+            self._rand_cache[sm] = [sm if sm_r is None or len(tokenize(sm_r)) > MAX_LEN - 2 else sm_r
+                                    for sm_r in sms_r]
+        return self
+
+    def save(self, path):
+        '''
+        function: Save the randomized SMILES cache built by fit
+        input: Path to a .npz file
+        '''
+        smiles = list(self._rand_cache.keys())
+        rand_lists = list(self._rand_cache.values())
+        smiles_buf, smiles_offsets = _pack(smiles)
+        rand_buf, rand_offsets = _pack([sm_r for sms_r in rand_lists for sm_r in sms_r])
+        # Randomized forms of smiles[i] are rand_offsets entries groups[i]..groups[i+1]
+        groups = np.cumsum([0] + [len(sms_r) for sms_r in rand_lists], dtype=np.int64)
+        np.savez(path, smiles=smiles_buf, smiles_offsets=smiles_offsets,
+                 randomized=rand_buf, randomized_offsets=rand_offsets, groups=groups)
+
+    def load(self, path):
+        '''
+        function: Load a randomized SMILES cache written by save
+        input: Path to a .npz file
+        output: self
+        '''
+        with np.load(path) as data:
+            smiles = _unpack(data['smiles'], data['smiles_offsets'])
+            rands = _unpack(data['randomized'], data['randomized_offsets'])
+            groups = data['groups'].tolist()
+        self._rand_cache = {sm: rands[groups[i]:groups[i+1]] for i, sm in enumerate(smiles)}
+        return self
+
+def worker_init_fn(worker_id):
+    '''
+    function: Give each DataLoader worker its own PCG64 stream for randomization.
+        Forked workers otherwise inherit one RNG state and draw identical permutations.
+    input: Worker ID (torch already folds it into the per-worker seed)
+    '''
+    _get_sme().rng = np.random.Generator(np.random.PCG64(get_worker_info().seed))
+
+def encode(tokens, vocab):
+    '''
+    function: Convert a list of tokens into vocabulary IDs
+    input: A list of tokens and a vocabulary
+    output: An int32 array of IDs
+    '''
+    return np.fromiter((vocab.stoi.get(token, vocab.unk_index) for token in tokens),
+                       dtype=np.int32, count=len(tokens))
+
+def encode_smiles(smiles, vocab):
+    '''
+    function: Encode SMILES into one flat ID buffer (CSR layout)
+    input: SMILES and a vocabulary
+    output: An int32 array of all IDs and an int64 array of N+1 offsets.
+        IDs of the i-th SMILES are flat_ids[offsets[i]:offsets[i+1]]
+    '''
+    token_lists = [tokenize(sm) for sm in smiles]
+    offsets = np.cumsum([0] + [len(tokens) for tokens in token_lists], dtype=np.int64)
+    # Fill the flat buffer directly instead of concatenating per-SMILES arrays
+    flat_ids = np.fromiter((vocab.stoi.get(token, vocab.unk_index) for tokens in token_lists for token in tokens),
+                           dtype=np.int32, count=offsets[-1])
+    return flat_ids, offsets
 
 class Seq2seqDataset(Dataset):
 
-    def __init__(self, smiles, vocab, seq_len=220, transform=Randomizer()):
-        self.smiles = smiles
+    def __init__(self, smiles, vocab, seq_len=220, transform=Randomizer(), data_dir=None):
         self.vocab = vocab
         self.seq_len = seq_len
         self.transform = transform
+        if data_dir is not None and transform is not None:
+            raise ValueError('data_dir holds pre-encoded SMILES and cannot be randomized; pass transform=None')
+        # Without randomization every epoch sees the same SMILES, so encode them once
+        # and drop the strings
+        if transform is not None:
+            self.smiles = smiles
+        elif data_dir is None:
+            self.smiles = None
+            self.flat_ids, self.offsets = encode_smiles(smiles, vocab)
+        else: # Written by preprocess.py. Memory-mapped pages are shared by DataLoader workers
+            self.smiles = None
+            self.flat_ids = np.load(os.path.join(data_dir, 'flat_ids.npy'), mmap_mode='r')
+            self.offsets = np.load(os.path.join(data_dir, 'offsets.npy'), mmap_mode='r')
+        self._n = len(self.offsets) - 1 if self.smiles is None else len(self.smiles)
+        # Pick the item path once instead of branching on every __getitem__
+        self._prepare = self._encoded if self.smiles is None else self._randomized
 
     def __len__(self):
-        return len(self.smiles)
+        return self._n
 
     def __getitem__(self, item):
-        sm = self.smiles[item]
-        sm = self.transform(sm) # List
-        content = [self.vocab.stoi.get(token, self.vocab.unk_index) for token in sm]
-        X = [self.vocab.sos_index] + content + [self.vocab.eos_index]
-        padding = [self.vocab.pad_index]*(self.seq_len - len(X))
-        X.extend(padding)
-        return torch.tensor(X)
+        return self._prepare(item)
+
+    def _encoded(self, item):
+        item = range(self._n)[item] # Negative indices and IndexError as for a list
+        return self.flat_ids[self.offsets[item]:self.offsets[item+1]]
+
+    def _randomized(self, item):
+        sm = self.transform(self.smiles[item]) # List
+        return encode(sm, self.vocab)
 
+    def collate(self, batch):
+        '''
+        function: Add <sos>/<eos> and pad a list of encoded SMILES. Pass as collate_fn to DataLoader.
+        input: A list of ID arrays
+        output: A LongTensor (B,T)
+        '''
+        X = np.full((len(batch), self.seq_len), self.vocab.pad_index, dtype=np.int64)
+        X[:, 0] = self.vocab.sos_index
+        for i, content in enumerate(batch):
+            L = min(len(content), self.seq_len - 2)
+            X[i, 1:L+1] = content[:L]
+            X[i, L+1] = self.vocab.eos_index
+        return torch.from_numpy(X)
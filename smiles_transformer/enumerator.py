@@ -129,8 +129,9 @@ class SmilesEnumerator(object):
         isomericSmiles: Generate SMILES containing information about stereogenic centers
         enum: Enumerate the SMILES during transform
         canonical: use canonical SMILES during transform (overrides enum)
+        seed: Seed of the PCG64 generator used for randomization
     """
-    def __init__(self, charset = '@C)(=cOn1S2/H[N]\\', pad=120, leftpad=True, isomericSmiles=True, enum=True, canonical=False):
+    def __init__(self, charset = '@C)(=cOn1S2/H[N]\\', pad=120, leftpad=True, isomericSmiles=True, enum=True, canonical=False, seed=None):
         self._charset = None
         self.charset = charset
         self.pad = pad
@@ -138,6 +139,7 @@ class SmilesEnumerator(object):
         self.isomericSmiles = isomericSmiles
         self.enumerate = enum
         self.canonical = canonical
+        self.rng = np.random.Generator(np.random.PCG64(seed))
 
     @property
     def charset(self):
@@ -170,8 +172,7 @@ class SmilesEnumerator(object):
         m = Chem.MolFromSmiles(smiles)
         if m is None:
             return None # Invalid SMILES
-        ans = list(range(m.GetNumAtoms()))
-        np.random.shuffle(ans)
+        ans = self.rng.permutation(m.GetNumAtoms()).tolist()
         nm = Chem.RenumberAtoms(m,ans)
         return Chem.MolToSmiles(nm, canonical=self.canonical, isomericSmiles=self.isomericSmiles)
 
@@ -0,0 +1,38 @@
+import argparse
+import os
+import numpy as np
+
+from build_vocab import WordVocab
+from dataset import Randomizer, encode_smiles
+from utils import read_column
+
+def preprocess_corpus(csv_path, out_dir, vocab, n_rand=0):
+    '''
+    function: Encode a SMILES csv once and save it for Seq2seqDataset(..., data_dir=out_dir)
+    input: Path to a csv with a canonical_smiles column, output directory, vocabulary,
+        number of randomized SMILES to cache per molecule
+    output: None. Writes flat_ids.npy and offsets.npy to out_dir,
+        and randomized.npz for Randomizer.load if n_rand > 0
+    '''
+    smiles = read_column(csv_path, 'canonical_smiles')
+    flat_ids, offsets = encode_smiles(smiles, vocab)
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, 'flat_ids.npy'), flat_ids)
+    np.save(os.path.join(out_dir, 'offsets.npy'), offsets)
+    if n_rand > 0:
+        Randomizer().fit(smiles, k=n_rand).save(os.path.join(out_dir, 'randomized.npz'))
+
+def main():
+    parser = argparse.ArgumentParser(description='Encode a SMILES csv into memory-mappable arrays')
+    parser.add_argument('--in_path', '-i', type=str, default='data/chembl_25.csv', help='input file')
+    parser.add_argument('--vocab', '-v', type=str, default='data/vocab.pkl', help='vocabulary (.pkl)')
+    parser.add_argument('--out_dir', '-o', type=str, default='data/chembl_25', help='output directory')
+    parser.add_argument('--n_rand', type=int, default=0, help='number of randomized SMILES to cache per molecule')
+    args = parser.parse_args()
+
+    vocab = WordVocab.load_vocab(args.vocab)
+    preprocess_corpus(args.in_path, args.out_dir, vocab, n_rand=args.n_rand)
+    print('Saved encoded SMILES to {}'.format(args.out_dir))
+
+if __name__=='__main__':
+    main()
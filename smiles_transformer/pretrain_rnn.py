@@ -13,7 +13,8 @@ from torch.autograd import Variable
 from torch.nn.utils import clip_grad_norm_
 from torch.nn import functional as F
 from build_vocab import WordVocab
-from dataset import Seq2seqDataset
+from dataset import Seq2seqDataset, worker_init_fn
+from utils import read_column
 
 PAD = 0
 UNK = 1
@@ -102,10 +103,10 @@ class Decoder(nn.Module):
 
 
 class RNNSeq2Seq(nn.Module):
-    def __init__(self, in_size, hidden_size, out_size, n_layers):
+    def __init__(self, in_size, hidden_size, out_size, n_layers, enc_dropout=0.5, dec_dropout=0.2):
         super(RNNSeq2Seq, self).__init__()
-        self.encoder = Encoder(in_size, hidden_size, hidden_size, n_layers)
-        self.decoder = Decoder(hidden_size, hidden_size, out_size, n_layers)
+        self.encoder = Encoder(in_size, hidden_size, hidden_size, n_layers, dropout=enc_dropout)
+        self.decoder = Decoder(hidden_size, hidden_size, out_size, n_layers, dropout=dec_dropout)
 
     def forward(self, src, trg, teacher_forcing_ratio=0.5): # (T,B)
         batch_size = src.size(1)
@@ -155,7 +156,7 @@ def parse_arguments():
     parser.add_argument('--name', '-n', type=str, default='ST', help='model name')
     parser.add_argument('--seq_len', type=int, default=220, help='maximum length of the paired seqence')
     parser.add_argument('--batch_size', '-b', type=int, default=16, help='batch size')
-    parser.add_argument('--n_worker', '-w', type=int, default=16, help='number of workers')
+    parser.add_argument('--n_worker', '-w', type=int, default=min(8, os.cpu_count()), help='number of workers')
     parser.add_argument('--hidden', type=int, default=256, help='length of hidden vector')
     parser.add_argument('--n_layer', '-l', type=int, default=8, help='number of layers')
     parser.add_argument('--n_head', type=int, default=8, help='number of attention heads')
@@ -172,11 +173,11 @@ def evaluate(model, val_loader, vocab):
     model.eval()
     total_loss = 0
     for b, data in enumerate(val_loader):
-        sm1, sm2 = torch.t(data[0].cuda()), torch.t(data[1].cuda()) # (T,B)
+        sm = torch.t(data.cuda(non_blocking=True)) # (T,B)
         with torch.no_grad():
-            output = model(sm1, sm2, teacher_forcing_ratio=0.0) # (T,B,V)
+            output = model(sm, sm, teacher_forcing_ratio=0.0) # (T,B,V)
         loss = F.nll_loss(output[1:].view(-1, len(vocab)),
-                               sm2[1:].contiguous().view(-1),
+                               sm[1:].contiguous().view(-1),
                                ignore_index=PAD)
         total_loss += loss.item()
     return total_loss / len(val_loader)
@@ -184,19 +185,16 @@ def evaluate(model, val_loader, vocab):
 def main():
     args = parse_arguments()
     hidden_size = 256
-    embed_size = 256
     assert torch.cuda.is_available()
 
     vocab = WordVocab.load_vocab(args.vocab)
     print("[!] Instantiating models...")
-    encoder = Encoder(len(vocab), embed_size, hidden_size, n_layers=3, dropout=0.5)
-    decoder = Decoder(embed_size, hidden_size, len(vocab), n_layers=3, dropout=0.5)
-    model = RNNSeq2Seq(encoder, decoder).cuda()
+    model = RNNSeq2Seq(len(vocab), hidden_size, len(vocab), n_layers=3, enc_dropout=0.5, dec_dropout=0.5).cuda()
     optimizer = optim.Adam(model.parameters(), lr=args.lr)
-    train_dataset = Seq2seqDataset(args.train_data, vocab)
-    train_loader = DataLoader(train_dataset, batch_size=args.batch_size, shuffle=True, num_workers=args.n_worker)
-    val_dataset = Seq2seqDataset(args.test_data, vocab, is_train=False)
-    val_loader = DataLoader(val_dataset, batch_size=args.batch_size, shuffle=False, num_workers=args.n_worker)
+    train_dataset = Seq2seqDataset(read_column(args.train_data, 'first'), vocab)
+    train_loader = DataLoader(train_dataset, batch_size=args.batch_size, shuffle=True, num_workers=args.n_worker, collate_fn=train_dataset.collate, pin_memory=True, worker_init_fn=worker_init_fn, persistent_workers=args.n_worker > 0)
+    val_dataset = Seq2seqDataset(read_column(args.test_data, 'first'), vocab, transform=None)
+    val_loader = DataLoader(val_dataset, batch_size=args.batch_size, shuffle=False, num_workers=args.n_worker, collate_fn=val_dataset.collate, pin_memory=True, worker_init_fn=worker_init_fn, persistent_workers=args.n_worker > 0)
     print(model)
     print('Total parameters:', sum(p.numel() for p in model.parameters()))
 
@@ -204,11 +202,11 @@ def main():
     for e in range(1, args.n_epoch):
         for b,data in tqdm(enumerate(train_loader)):
             model.train()
-            sm1, sm2 = torch.t(data[0].cuda()), torch.t(data[1].cuda()) # (T,B)
+            sm = torch.t(data.cuda(non_blocking=True)) # (T,B)
             optimizer.zero_grad()
-            output = model(sm1, sm2, teacher_forcing_ratio=1.0) # (T,B,V)
+            output = model(sm, sm, teacher_forcing_ratio=1.0) # (T,B,V)
             loss = F.nll_loss(output[1:].view(-1, len(vocab)),
-                    sm2[1:].contiguous().view(-1), ignore_index=PAD)
+                    sm[1:].contiguous().view(-1), ignore_index=PAD)
             loss.backward()
             clip_grad_norm_(model.parameters(), args.grad_clip)
             optimizer.step()
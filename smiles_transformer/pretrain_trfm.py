@@ -3,7 +3,6 @@ import math
 import os
 
 import numpy as np
-import pandas as pd
 import torch
 from torch import nn
 from torch import optim
@@ -13,7 +12,8 @@ from torch.utils.data import DataLoader
 from tqdm import tqdm
 
 from build_vocab import WordVocab
-from dataset import Seq2seqDataset
+from dataset import Randomizer, Seq2seqDataset, worker_init_fn
+from utils import read_column
 
 PAD = 0
 UNK = 1
@@ -100,11 +100,13 @@ def parse_arguments():
     parser.add_argument('--name', '-n', type=str, default='ST', help='model name')
     parser.add_argument('--seq_len', type=int, default=220, help='maximum length of the paired seqence')
     parser.add_argument('--batch_size', '-b', type=int, default=8, help='batch size')
-    parser.add_argument('--n_worker', '-w', type=int, default=16, help='number of workers')
+    parser.add_argument('--n_worker', '-w', type=int, default=min(8, os.cpu_count()), help='number of workers')
     parser.add_argument('--hidden', type=int, default=256, help='length of hidden vector')
     parser.add_argument('--n_layer', '-l', type=int, default=4, help='number of layers')
     parser.add_argument('--n_head', type=int, default=4, help='number of attention heads')
     parser.add_argument('--lr', type=float, default=1e-4, help='Adam learning rate')
+    parser.add_argument('--n_rand', type=int, default=0, help='number of cached randomized SMILES per molecule (0: randomize every time)')
+    parser.add_argument('--rand_cache', type=str, default=None, help='randomized SMILES cache (.npz) from preprocess.py')
     parser.add_argument('--gpu', metavar='N', type=int, nargs='+', help='list of GPU IDs to use')
     return parser.parse_args()
 
@@ -113,7 +115,7 @@ def evaluate(model, test_loader, vocab):
     model.eval()
     total_loss = 0
     for b, sm in enumerate(test_loader):
-        sm = torch.t(sm.cuda()) # (T,B)
+        sm = torch.t(sm.cuda(non_blocking=True)) # (T,B)
         with torch.no_grad():
             output = model(sm) # (T,B,V)
         loss = F.nll_loss(output.view(-1, len(vocab)),
@@ -128,11 +130,17 @@ def main():
 
     print('Loading dataset...')
     vocab = WordVocab.load_vocab(args.vocab)
-    dataset = Seq2seqDataset(pd.read_csv(args.data)['canonical_smiles'].values, vocab)
+    smiles = read_column(args.data, 'canonical_smiles')
+    transform = Randomizer()
+    if args.rand_cache is not None:
+        transform.load(args.rand_cache)
+    elif args.n_rand > 0:
+        transform.fit(smiles, k=args.n_rand)
+    dataset = Seq2seqDataset(smiles, vocab, transform=transform)
     test_size = 10000
     train, test = torch.utils.data.random_split(dataset, [len(dataset)-test_size, test_size])
-    train_loader = DataLoader(train, batch_size=args.batch_size, shuffle=True, num_workers=args.n_worker)
-    test_loader = DataLoader(test, batch_size=args.batch_size, shuffle=False, num_workers=args.n_worker)
+    train_loader = DataLoader(train, batch_size=args.batch_size, shuffle=True, num_workers=args.n_worker, collate_fn=dataset.collate, pin_memory=True, worker_init_fn=worker_init_fn, persistent_workers=args.n_worker > 0)
+    test_loader = DataLoader(test, batch_size=args.batch_size, shuffle=False, num_workers=args.n_worker, collate_fn=dataset.collate, pin_memory=True, worker_init_fn=worker_init_fn, persistent_workers=args.n_worker > 0)
     print('Train size:', len(train))
     print('Test size:', len(test))
     del dataset, train, test
@@ -145,7 +153,7 @@ def main():
     best_loss = None
     for e in range(1, args.n_epoch):
         for b, sm in tqdm(enumerate(train_loader)):
-            sm = torch.t(sm.cuda()) # (T,B)
+            sm = torch.t(sm.cuda(non_blocking=True)) # (T,B)
             optimizer.zero_grad()
             output = model(sm) # (T,B,V)
             loss = F.nll_loss(output.view(-1, len(vocab)),
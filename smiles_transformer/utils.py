@@ -1,3 +1,4 @@
+import re
 import torch
 import math
 import torch.nn as nn
@@ -5,6 +6,25 @@ from rdkit import Chem
 from rdkit import rdBase
 rdBase.DisableLog('rdApp.*')
 
+# SMILES words: %nn ring bonds, two-letter elements and charges, otherwise a single character
+TOKEN_RE = re.compile(r'%.{0,2}|Cl|Ca|Cu|Br|Be|Ba|Bi|Si|Se|Sr|Na|Ni|Rb|Ra|Xe|Li|Al|As|Ag|Au|Mg|Mn|Te|Zn|'
+                      r'si|se|te|He|\+[234]|-[234]|Kr|Fe|.', re.DOTALL)
+
+SPACE_RE = re.compile(r'\s')
+
+def tokenize(sm):
+    '''
+    function: Split SMILES into words in one regex pass. Care for Cl, Br, Si, Se, Na etc.
+        Same as split(sm).split(): whitespace is dropped, not returned as a word
+    input: A SMILES
+    output: A list of words
+    '''
+    words = TOKEN_RE.findall(sm)
+    if SPACE_RE.search(sm) is None:
+        return words
+    # Rare: a %nn word may have swallowed whitespace, so re-split like split(sm).split()
+    return ' '.join(words).split()
+
 # Split SMILES into words
 def split(sm):
     '''
@@ -12,130 +32,18 @@ def split(sm):
     input: A SMILES
     output: A string with space between words
     '''
-    arr = []
-    i = 0
-    while i < len(sm)-1:
-        if not sm[i] in ['%', 'C', 'B', 'S', 'N', 'R', 'X', 'L', 'A', 'M', \
-                        'T', 'Z', 's', 't', 'H', '+', '-', 'K', 'F']:
-            arr.append(sm[i])
-            i += 1
-        elif sm[i]=='%':
-            arr.append(sm[i:i+3])
-            i += 3
-        elif sm[i]=='C' and sm[i+1]=='l':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='C' and sm[i+1]=='a':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='C' and sm[i+1]=='u':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='B' and sm[i+1]=='r':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='B' and sm[i+1]=='e':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='B' and sm[i+1]=='a':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='B' and sm[i+1]=='i':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='S' and sm[i+1]=='i':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='S' and sm[i+1]=='e':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='S' and sm[i+1]=='r':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='N' and sm[i+1]=='a':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='N' and sm[i+1]=='i':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='R' and sm[i+1]=='b':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='R' and sm[i+1]=='a':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='X' and sm[i+1]=='e':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='L' and sm[i+1]=='i':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='A' and sm[i+1]=='l':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='A' and sm[i+1]=='s':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='A' and sm[i+1]=='g':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='A' and sm[i+1]=='u':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='M' and sm[i+1]=='g':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='M' and sm[i+1]=='n':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='T' and sm[i+1]=='e':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='Z' and sm[i+1]=='n':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='s' and sm[i+1]=='i':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='s' and sm[i+1]=='e':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='t' and sm[i+1]=='e':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='H' and sm[i+1]=='e':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='+' and sm[i+1]=='2':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='+' and sm[i+1]=='3':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='+' and sm[i+1]=='4':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='-' and sm[i+1]=='2':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='-' and sm[i+1]=='3':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='-' and sm[i+1]=='4':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='K' and sm[i+1]=='r':
-            arr.append(sm[i:i+2])
-            i += 2
-        elif sm[i]=='F' and sm[i+1]=='e':
-            arr.append(sm[i:i+2])
-            i += 2
-        else:
-            arr.append(sm[i])
-            i += 1
-    if i == len(sm)-1:
-        arr.append(sm[i])
-    return ' '.join(arr) 
+    return ' '.join(TOKEN_RE.findall(sm))
+
+# Read a csv column with multithreaded Arrow parsing
+def read_column(path, column):
+    '''
+    function: Read one column of a csv file without loading the others
+    input: Path to a csv file, column name
+    output: A list of values
+    '''
+    import pyarrow.csv as pacsv # Only needed here; split() users need not install pyarrow
+    table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(include_columns=[column]))
+    return table.column(column).to_pylist()
 
 # 活性化関数
 class GELU(nn.Module):
@@ -0,0 +1,77 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# dataset.py imports its siblings as top-level modules, like the training scripts do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'smiles_transformer'))
+import dataset
+from build_vocab import WordVocab
+from dataset import Randomizer, Seq2seqDataset, encode
+from preprocess import preprocess_corpus
+from utils import split, tokenize
+
+SMILES = ['CCO', 'c1ccccc1Cl', 'CC(=O)Nc1ccc(O)cc1']
+
+def build_vocab():
+    return WordVocab([split(sm) for sm in SMILES])
+
+def test_encoded_items():
+    vocab = build_vocab()
+    ds = Seq2seqDataset(SMILES, vocab, transform=None)
+    assert len(ds)==len(SMILES)
+    for i, sm in enumerate(SMILES):
+        assert ds[i].tolist()==encode(tokenize(sm), vocab).tolist()
+    assert ds[-1].tolist()==ds[len(SMILES)-1].tolist()
+    assert ds[-2].tolist()==ds[len(SMILES)-2].tolist()
+    with pytest.raises(IndexError):
+        ds[len(SMILES)]
+
+def test_randomized_items():
+    vocab = build_vocab()
+    ds = Seq2seqDataset(SMILES, vocab, transform=Randomizer())
+    for i, sm in enumerate(SMILES):
+        dataset._get_sme().rng = np.random.Generator(np.random.PCG64(i))
+        pred = encode(Randomizer()(sm), vocab)
+        dataset._get_sme().rng = np.random.Generator(np.random.PCG64(i))
+        assert ds[i].tolist()==pred.tolist()
+
+def test_collate():
+    vocab = build_vocab()
+    ds = Seq2seqDataset(SMILES, vocab, seq_len=8, transform=None)
+    X = ds.collate([ds[0], ds[1]])
+    assert tuple(X.shape)==(2, 8)
+    # Short sequence: <sos> IDs <eos> then padding
+    assert X[0].tolist()==[vocab.sos_index] + ds[0].tolist() + [vocab.eos_index] + [vocab.pad_index]*3
+    # Over-long sequence is truncated but still ends with <eos>
+    assert X[1].tolist()==[vocab.sos_index] + ds[1][:6].tolist() + [vocab.eos_index]
+
+def test_data_dir(tmp_path):
+    vocab = build_vocab()
+    csv_path = str(tmp_path / 'smiles.csv')
+    pd.DataFrame({'canonical_smiles': SMILES}).to_csv(csv_path, index=False)
+    preprocess_corpus(csv_path, str(tmp_path / 'encoded'), vocab)
+    ds = Seq2seqDataset(None, vocab, seq_len=8, transform=None, data_dir=str(tmp_path / 'encoded'))
+    ref = Seq2seqDataset(SMILES, vocab, seq_len=8, transform=None)
+    assert isinstance(ds.flat_ids, np.memmap)
+    assert len(ds)==len(ref)
+    for i in range(len(ref)):
+        assert ds[i].tolist()==ref[i].tolist()
+    assert ds[-1].tolist()==ref[len(ref)-1].tolist()
+    batch = list(range(len(ref)))
+    assert ds.collate([ds[i] for i in batch]).equal(ref.collate([ref[i] for i in batch]))
+    with pytest.raises(ValueError):
+        Seq2seqDataset(None, vocab, data_dir=str(tmp_path / 'encoded'))
+
+def test_randomizer_cache(tmp_path):
+    rand = Randomizer().fit(SMILES, k=3)
+    assert sorted(rand._rand_cache)==sorted(SMILES)
+    assert all(len(sms_r)==3 for sms_r in rand._rand_cache.values())
+    path = str(tmp_path / 'randomized.npz')
+    rand.save(path)
+    loaded = Randomizer().load(path)
+    assert loaded._rand_cache==rand._rand_cache
+    assert loaded('CCO') in [tokenize(sm_r) for sm_r in rand._rand_cache['CCO']]
+    with pytest.raises(ValueError):
+        Randomizer().fit(SMILES, k=0)
@@ -1,6 +1,19 @@
-from smiles_transformer.utils import split
+from smiles_transformer.utils import split, tokenize
 
 def test_split():
     sm = 'C(=O)CC(Br)C[N+]CN'
     pred = 'C ( = O ) C C ( Br ) C [ N + ] C N'
-    assert split(sm)==pred
\ No newline at end of file
+    assert split(sm)==pred
+
+def test_tokenize():
+    sm = 'C(=O)CC(Br)C[N+]CN%12[Fe+2]'
+    pred = ['C', '(', '=', 'O', ')', 'C', 'C', '(', 'Br', ')', 'C', '[', 'N', '+', ']', 'C', 'N', '%12',
+            '[', 'Fe', '+2', ']']
+    assert tokenize(sm)==pred
+    assert split(sm)==' '.join(pred)
+
+def test_tokenize_whitespace():
+    # Whitespace is dropped as split(sm).split() did, never encoded as a word
+    for sm in ['CCO C', ' CCO\t', 'C%1 2', 'CC |$;$|']:
+        assert tokenize(sm)==split(sm).split()
+    assert tokenize('CCO C')==['C', 'C', 'O', 'C']